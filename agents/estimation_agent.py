@@ -1,7 +1,8 @@
 from langchain_core.prompts import PromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 from langchain_community.document_loaders import TextLoader
-from utils.helpers import clean_json
+from utils.output_parser import parse_estimation
+from agents.fixup_agent import make_fixer
 
 # -----------------------------
 # Load QA standards
@@ -47,15 +48,18 @@ parser = StrOutputParser()
 # -----------------------------
 # Run Estimation Agent
 # -----------------------------
-def run_estimation(model, qa_standards, user_story):
+def run_estimation(model, qa_standards, user_story, parse_stats=None):
     """
     Calls LangChain model to generate QA estimation for a user story.
-    Returns Python dict after cleaning AIMessage output.
+    Returns Python dict with fields coerced to the estimation schema.
+    Malformed output is repaired locally; only the broken fragment is
+    sent back to the model if that fails. The parse outcome is recorded
+    in `parse_stats` when given.
     """
     raw_output = (qa_prompt | model | parser).invoke({
         "qa_standards": qa_standards,
         "user_story": user_story
     })
 
-    estimation = clean_json(raw_output)
+    estimation = parse_estimation(raw_output, fixer=make_fixer(model), stats=parse_stats)
     return estimation
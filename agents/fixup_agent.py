@@ -0,0 +1,49 @@
+# agents/fixup_agent.py
+from langchain_core.prompts import PromptTemplate
+from langchain_core.output_parsers import StrOutputParser
+
+# -----------------------------
+# PROMPT DEFINITION
+# -----------------------------
+parser = StrOutputParser()
+
+fixup_prompt = PromptTemplate(
+    template="""
+The following JSON fragment could not be parsed.
+
+ERROR:
+{error}
+
+TARGET SCHEMA (one JSON object with these fields):
+{schema}
+
+FRAGMENT:
+{fragment}
+
+Fix ONLY this fragment so it matches the target schema. Rename keys to the
+schema field names and keep every value that is already correct.
+Numbers must be plain JSON numbers without units or currency symbols.
+Lists must be JSON arrays of strings.
+
+Return STRICT JSON ONLY.
+""",
+    input_variables=["error", "schema", "fragment"]
+)
+
+# -----------------------------
+# FUNCTIONS
+# -----------------------------
+def make_fixer(model):
+    """
+    Returns a fixer(fragment, error, schema) callable for utils.output_parser.
+    It sends only the broken fragment and the target schema to the model,
+    not the whole prompt.
+    """
+    def fixer(fragment, error, schema):
+        return (fixup_prompt | model | parser).invoke({
+            "error": error,
+            "schema": schema,
+            "fragment": fragment
+        })
+
+    return fixer
@@ -1,28 +1,5 @@
 # agents/helpers.py
-import json
-import re
-from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
-
-
-# -----------------------------
-# JSON CLEANER
-# -----------------------------
-def clean_json(raw):
-    """
-    Converts raw output from LangChain into a Python object.
-    Handles strings, AIMessage objects, and JSON fences (```json).
-    """
-    # If it's an AIMessage, get the content
-    if isinstance(raw, AIMessage):
-        raw_text = raw.content
-    else:
-        raw_text = str(raw)
-
-    # Remove ```json or ``` fences
-    raw_text = re.sub(r"```json|```", "", raw_text).strip()
-
-    # Convert to Python object
-    return json.loads(raw_text)
+from utils.helpers import clean_json
 
 # -----------------------------
 # MONEY FORMATTING
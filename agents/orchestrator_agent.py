@@ -4,17 +4,20 @@ from services.roi_service import calculate_roi, add_what_if, add_decisions
 from utils.helpers import calc_suitability
 
 
-def orchestrate(model, qa_standards, tc_standards, user_story, what_if_multiplier=1.0):
+def orchestrate(model, qa_standards, tc_standards, user_story, what_if_multiplier=1.0, parse_stats=None):
     """
     Orchestrates the multi-agent flow:
     1. Estimation
     2. Test case generation
     3. ROI calculation
     4. What-If & decisions
+
+    `parse_stats` (see utils.output_parser.new_parse_stats) collects how
+    each model output was parsed.
     """
 
     # Step 1: QA Estimation
-    estimation = run_estimation(model, qa_standards, user_story)
+    estimation = run_estimation(model, qa_standards, user_story, parse_stats)
 
     # Step 2: ROI calculation
     roi_data = calculate_roi(estimation)
@@ -25,7 +28,7 @@ def orchestrate(model, qa_standards, tc_standards, user_story, what_if_multiplie
     estimation["User Story"] = user_story
 
     # Step 4: Test cases
-    test_cases = run_test_case_gen(model, tc_standards, user_story)
+    test_cases = run_test_case_gen(model, tc_standards, user_story, parse_stats)
     for tc in test_cases:
         tc["User Story"] = user_story
 
@@ -1,7 +1,6 @@
 # agents/test_case_agent.py
-import json
-import re
-from utils.helpers import clean_json
+from utils.output_parser import parse_test_cases
+from agents.fixup_agent import make_fixer
 
 # -----------------------------
 # PROMPT DEFINITION
@@ -27,10 +26,12 @@ Return STRICT JSON ARRAY ONLY.
 # -----------------------------
 # FUNCTIONS
 # -----------------------------
-def run_test_case_gen(model, tc_standards, user_story):
+def run_test_case_gen(model, tc_standards, user_story, parse_stats=None):
     """
     Runs the Test Case Generation LLM and returns a JSON array of test cases.
-    Handles AIMessage outputs from LangChain.
+    Handles AIMessage outputs from LangChain. Broken items are repaired
+    locally and only those items are sent back to the model if that fails.
+    The parse outcome is recorded in `parse_stats` when given.
     """
 
     # Invoke LLM
@@ -39,6 +40,6 @@ def run_test_case_gen(model, tc_standards, user_story):
         "user_story": user_story
     })
 
-    # Convert AIMessage or string into Python object
-    return clean_json(raw)
+    # Convert AIMessage or string into a list of test case dicts
+    return parse_test_cases(raw, fixer=make_fixer(model), stats=parse_stats)
 
@@ -1,5 +1,5 @@
 import streamlit as st
-import os, pandas as pd
+import os, sqlite3, pandas as pd
 from dotenv import load_dotenv
 from io import BytesIO
 import matplotlib.pyplot as plt
@@ -11,6 +11,9 @@ from agents.orchestrator_agent import orchestrate
 from utils.helpers import load_txt
 from services.roi_service import calculate_roi, add_what_if, add_decisions
 from services.jira_service import create_test_case
+from utils.output_parser import new_parse_stats, summarize_parse_stats
+from services.history_service import connect, start_run, standards_version, list_runs, list_filters, load_run
+from services.analysis_service import analyze_stories
 
 # -----------------------------
 # SESSION STATE
@@ -21,6 +24,12 @@ if "estimation_rows" not in st.session_state:
 if "tc_rows" not in st.session_state:
     st.session_state.tc_rows = []
 
+if "parse_stats" not in st.session_state:
+    st.session_state.parse_stats = new_parse_stats()
+
+if "loaded_run" not in st.session_state:
+    st.session_state.loaded_run = None
+
 # -----------------------------
 # ENV & MODEL
 # -----------------------------
@@ -54,20 +63,114 @@ what_if_multiplier = st.sidebar.slider("🔧 Automation Cost What-If Multiplier"
 if st.button("Analyze Impact") and stories_text.strip():
     st.session_state.estimation_rows = []
     st.session_state.tc_rows = []
+    st.session_state.parse_stats = new_parse_stats()
+    st.session_state.loaded_run = None
 
     stories = [s.strip() for s in stories_text.split("|") if s.strip()]
 
-    for story in stories:
-        estimation, test_cases = orchestrate(model, qa_standards, tc_standards, story, what_if_multiplier)
-        st.session_state.estimation_rows.append(estimation)
-        st.session_state.tc_rows.extend(test_cases)
+    # History store problems must never fail the (already paid for) analysis
+    history, run_id = None, None
+    try:
+        history = connect()
+        run_id = start_run(
+            history,
+            os.getenv("AZURE_DEPLOYMENT_NAME", "unknown"),
+            standards_version(qa_standards, tc_standards),
+            what_if_multiplier
+        )
+    except (sqlite3.Error, OSError) as e:
+        st.warning(f"⚠️ History store unavailable, this run will not be saved: {e}")
+
+    try:
+        # A story that cannot be analyzed is skipped with a warning; the others are kept
+        estimation_rows, tc_rows, failed_stories = analyze_stories(
+            stories,
+            lambda story: orchestrate(model, qa_standards, tc_standards, story, what_if_multiplier,
+                                      st.session_state.parse_stats),
+            history,
+            run_id,
+            warn=st.warning
+        )
+        st.session_state.estimation_rows = estimation_rows
+        st.session_state.tc_rows = tc_rows
+        if failed_stories:
+            st.error(f"❌ {len(failed_stories)} of {len(stories)} stories could not be analyzed")
+    finally:
+        if history:
+            history.close()
+
+# -----------------------------
+# HISTORICAL RUNS
+# -----------------------------
+with st.expander("🗂️ Historical Runs"):
+    # History store problems must never block the rest of the page
+    history = None
+    try:
+        history = connect()
+        filters = list_filters(history)
+        f1, f2 = st.columns(2)
+        model_filter = f1.selectbox("Model", ["All"] + filters["models"])
+        standards_filter = f2.selectbox("Standards Version", ["All"] + filters["standards_versions"])
+
+        runs = list_runs(
+            history,
+            model=None if model_filter == "All" else model_filter,
+            standards_version=None if standards_filter == "All" else standards_filter
+        )
+
+        if runs:
+            runs_df = pd.DataFrame(runs)
+            st.dataframe(runs_df)
+
+            trend_df = runs_df.sort_values("created_at").set_index("created_at")
+            st.line_chart(trend_df[["avg_roi_percentage"]])
+
+            selected_run = st.selectbox(
+                "Reload run",
+                runs_df["run_id"],
+                format_func=lambda r: f"{r} ({runs_df.loc[runs_df.run_id == r, 'created_at'].iloc[0]}, "
+                                      f"{runs_df.loc[runs_df.run_id == r, 'stories'].iloc[0]} stories)"
+            )
+            if st.button("📂 Load Run into Dashboard"):
+                estimation_rows, tc_rows, run_multiplier = load_run(history, selected_run)
+                st.session_state.estimation_rows = estimation_rows
+                st.session_state.tc_rows = tc_rows
+                # No model output was parsed for a reloaded run
+                st.session_state.parse_stats = new_parse_stats()
+                st.session_state.loaded_run = {"run_id": selected_run, "what_if_multiplier": run_multiplier}
+        else:
+            st.caption("No stored runs yet.")
+    except (sqlite3.Error, OSError, ValueError) as e:
+        st.warning(f"⚠️ History store unavailable: {e}")
+    finally:
+        if history:
+            history.close()
+
+# -----------------------------
+# OUTPUT PARSING STATS
+# -----------------------------
+stats = summarize_parse_stats(st.session_state.parse_stats)
+if stats["total"]:
+    st.sidebar.metric("🧩 Outputs recovered without re-prompt", f"{stats['local_recovery_rate']:.0f}%")
+    st.sidebar.caption(
+        f"{stats['parsed']} clean · {stats['repaired']} repaired locally · "
+        f"{stats['llm_fixed']} fixed by model · {stats['failed']} failed"
+    )
 
 # -----------------------------
 # RESULTS
 # -----------------------------
 if st.session_state.estimation_rows:
     import services.excel_service as excel_service
-    excel_service.show_dashboard_and_download(st.session_state.estimation_rows, st.session_state.tc_rows, what_if_multiplier)
+    loaded_run = st.session_state.loaded_run
+    if loaded_run:
+        # A reloaded run keeps the What-If multiplier it was analyzed with
+        dashboard_multiplier = loaded_run["what_if_multiplier"]
+        st.info(f"📂 Showing stored run {loaded_run['run_id']} "
+                f"(What-If multiplier ×{dashboard_multiplier}, slider ignored)")
+    else:
+        dashboard_multiplier = what_if_multiplier
+    excel_service.show_dashboard_and_download(st.session_state.estimation_rows, st.session_state.tc_rows, dashboard_multiplier)
 
 ############JIRA INTEGRATION#####################s
 
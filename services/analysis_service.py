@@ -0,0 +1,55 @@
+import sqlite3
+from services.history_service import save_story_result, complete_run, delete_run
+
+
+def analyze_stories(stories, analyze, history=None, run_id=None, warn=print):
+    """
+    Runs `analyze(story) -> (estimation, test_cases)` for every story.
+
+    A story whose analysis fails (unparseable output, failed fix-up call,
+    model or network error) is reported through `warn` and skipped, so the
+    stories already analyzed are kept. When a history connection and run_id
+    are given, each result is saved and the run is completed at the end;
+    history store errors are reported through `warn` as well. A run that
+    ends with no analyzed story, or is interrupted, is deleted rather than
+    left behind as an incomplete run.
+
+    Returns (estimation_rows, test_case_rows, failed_stories).
+    """
+    estimation_rows, tc_rows, failed = [], [], []
+    started_run, completed = run_id, False
+
+    try:
+        for story in stories:
+            try:
+                estimation, test_cases = analyze(story)
+            except Exception as e:
+                failed.append(story)
+                warn(f"⚠️ Skipped story, analysis failed: {story[:80]} ({e})")
+                continue
+
+            estimation_rows.append(estimation)
+            tc_rows.extend(test_cases)
+
+            if run_id:
+                try:
+                    save_story_result(history, run_id, story, estimation, test_cases)
+                except (sqlite3.Error, ValueError) as e:
+                    warn(f"⚠️ Could not save run history, continuing without it: {e}")
+                    run_id = None
+
+        if run_id and estimation_rows:
+            try:
+                complete_run(history, run_id)
+                completed = True
+            except sqlite3.Error as e:
+                warn(f"⚠️ Could not mark run as complete: {e}")
+    finally:
+        # Also runs when the script is stopped mid-loop (e.g. a Streamlit rerun)
+        if started_run and not completed:
+            try:
+                delete_run(history, started_run)
+            except sqlite3.Error:
+                pass
+
+    return estimation_rows, tc_rows, failed
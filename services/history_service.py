@@ -0,0 +1,245 @@
+import os
+import json
+import sqlite3
+import hashlib
+import uuid
+from datetime import datetime, timezone
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    created_at TEXT NOT NULL,
+    completed_at TEXT,
+    model TEXT NOT NULL,
+    standards_version TEXT NOT NULL,
+    what_if_multiplier REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS story_results (
+    run_id TEXT NOT NULL REFERENCES runs(run_id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    story_hash TEXT NOT NULL,
+    model TEXT NOT NULL,
+    standards_version TEXT NOT NULL,
+    user_story TEXT NOT NULL,
+    manual_testing_cost REAL,
+    automation_testing_cost REAL,
+    roi_percentage REAL,
+    automation_suitability_score REAL,
+    estimation TEXT NOT NULL,
+    test_cases TEXT NOT NULL,
+    PRIMARY KEY (run_id, position)
+);
+CREATE INDEX IF NOT EXISTS idx_runs_created_at ON runs(created_at);
+CREATE INDEX IF NOT EXISTS idx_runs_model_standards ON runs(model, standards_version);
+CREATE INDEX IF NOT EXISTS idx_results_story_hash ON story_results(story_hash);
+CREATE INDEX IF NOT EXISTS idx_results_model_standards ON story_results(model, standards_version);
+"""
+
+# -----------------------------
+# CONNECTION & KEYS
+# -----------------------------
+def connect(path=None):
+    """
+    Opens the history database, creating tables and indexes on first use.
+    Defaults to HISTORY_DB_PATH from the environment, or data/history.db.
+    Open one connection per run or page render and pass it to the
+    functions below.
+    """
+    path = str(path or os.getenv("HISTORY_DB_PATH", "data/history.db"))
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA foreign_keys=ON")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def story_hash(user_story):
+    """
+    Stable key for a user story, ignoring case and whitespace differences.
+    """
+    normalized = " ".join(user_story.lower().split())
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()[:16]
+
+
+def standards_version(*standards):
+    """
+    Version key for the QA and testing standards a run was produced with.
+    """
+    digest = hashlib.sha256()
+    for text in standards:
+        digest.update(text.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()[:12]
+
+
+def _now():
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+# -----------------------------
+# WRITE
+# -----------------------------
+def start_run(conn, model, standards_version, what_if_multiplier=1.0):
+    """
+    Registers a new, incomplete analysis run and returns its run_id.
+    """
+    run_id = uuid.uuid4().hex[:12]
+    with conn:
+        conn.execute(
+            "INSERT INTO runs (run_id, created_at, model, standards_version, what_if_multiplier) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (run_id, _now(), model, standards_version, what_if_multiplier)
+        )
+    return run_id
+
+
+def save_story_result(conn, run_id, user_story, estimation, test_cases):
+    """
+    Appends one orchestrated story (estimation + test cases) to a run,
+    after the stories already saved for it.
+    """
+    with conn:
+        run = conn.execute(
+            "SELECT model, standards_version FROM runs WHERE run_id = ?", (run_id,)
+        ).fetchone()
+        if run is None:
+            raise ValueError(f"Unknown run_id: {run_id}")
+
+        position = conn.execute(
+            "SELECT COALESCE(MAX(position) + 1, 0) FROM story_results WHERE run_id = ?", (run_id,)
+        ).fetchone()[0]
+
+        conn.execute(
+            "INSERT INTO story_results VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                run_id,
+                position,
+                story_hash(user_story),
+                run["model"],
+                run["standards_version"],
+                user_story,
+                estimation.get("manual_testing_cost"),
+                estimation.get("automation_testing_cost"),
+                estimation.get("roi_percentage"),
+                estimation.get("automation_suitability_score"),
+                json.dumps(estimation, default=str),
+                json.dumps(test_cases, default=str),
+            )
+        )
+
+
+def complete_run(conn, run_id):
+    """
+    Marks a run as complete. Runs that never complete are hidden from
+    list_runs, list_filters and story_history by default.
+    """
+    with conn:
+        conn.execute("UPDATE runs SET completed_at = ? WHERE run_id = ?", (_now(), run_id))
+
+# -----------------------------
+# READ
+# -----------------------------
+def list_runs(conn, model=None, standards_version=None, since=None, until=None,
+              include_incomplete=False):
+    """
+    Returns one aggregated row per completed run (newest first), optionally
+    filtered by model, standards version and an ISO date range.
+    """
+    filters, params = [], []
+    if not include_incomplete:
+        filters.append("r.completed_at IS NOT NULL")
+    if model:
+        filters.append("r.model = ?")
+        params.append(model)
+    if standards_version:
+        filters.append("r.standards_version = ?")
+        params.append(standards_version)
+    if since:
+        filters.append("r.created_at >= ?")
+        params.append(since)
+    if until:
+        filters.append("r.created_at < ?")
+        params.append(until)
+    where = f"WHERE {' AND '.join(filters)}" if filters else ""
+
+    rows = conn.execute(f"""
+        SELECT r.run_id, r.created_at, r.completed_at, r.model, r.standards_version,
+               r.what_if_multiplier,
+               COUNT(s.position) AS stories,
+               SUM(s.manual_testing_cost) AS manual_testing_cost,
+               SUM(s.automation_testing_cost) AS automation_testing_cost,
+               AVG(s.roi_percentage) AS avg_roi_percentage,
+               AVG(s.automation_suitability_score) AS avg_suitability_score
+        FROM runs r
+        LEFT JOIN story_results s ON s.run_id = r.run_id
+        {where}
+        GROUP BY r.run_id
+        ORDER BY r.created_at DESC
+    """, params).fetchall()
+    return [dict(row) for row in rows]
+
+
+def list_filters(conn, include_incomplete=False):
+    """
+    Returns the distinct models and standards versions of completed runs.
+    """
+    where = "" if include_incomplete else "WHERE completed_at IS NOT NULL"
+    models = [r[0] for r in conn.execute(
+        f"SELECT DISTINCT model FROM runs {where} ORDER BY model"
+    )]
+    versions = [r[0] for r in conn.execute(
+        f"SELECT DISTINCT standards_version FROM runs {where} ORDER BY standards_version"
+    )]
+    return {"models": models, "standards_versions": versions}
+
+
+def load_run(conn, run_id):
+    """
+    Reloads a stored run without any model calls.
+    Returns (estimation_rows, test_case_rows, what_if_multiplier).
+    """
+    run = conn.execute(
+        "SELECT what_if_multiplier FROM runs WHERE run_id = ?", (run_id,)
+    ).fetchone()
+    if run is None:
+        raise ValueError(f"Unknown run_id: {run_id}")
+
+    rows = conn.execute(
+        "SELECT estimation, test_cases FROM story_results WHERE run_id = ? ORDER BY position",
+        (run_id,)
+    ).fetchall()
+
+    estimation_rows, tc_rows = [], []
+    for row in rows:
+        estimation_rows.append(json.loads(row["estimation"]))
+        tc_rows.extend(json.loads(row["test_cases"]))
+    return estimation_rows, tc_rows, run["what_if_multiplier"]
+
+
+def story_history(conn, user_story, include_incomplete=False):
+    """
+    Returns the ROI of one user story across all completed runs, oldest first.
+    """
+    completed = "" if include_incomplete else "AND r.completed_at IS NOT NULL"
+    rows = conn.execute(f"""
+        SELECT r.run_id, r.created_at, s.model, s.standards_version,
+               s.manual_testing_cost, s.automation_testing_cost,
+               s.roi_percentage, s.automation_suitability_score
+        FROM story_results s
+        JOIN runs r ON r.run_id = s.run_id
+        WHERE s.story_hash = ? {completed}
+        ORDER BY r.created_at, s.position
+    """, (story_hash(user_story),)).fetchall()
+    return [dict(row) for row in rows]
+
+
+def delete_run(conn, run_id):
+    """
+    Removes a run and its stored story results.
+    """
+    with conn:
+        conn.execute("DELETE FROM runs WHERE run_id = ?", (run_id,))
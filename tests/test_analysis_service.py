@@ -0,0 +1,72 @@
+import pytest
+
+from services.analysis_service import analyze_stories
+from services.history_service import connect, list_runs, load_run, start_run
+from utils.output_parser import OutputParseError
+
+
+def analyze(story):
+    if story.startswith("bad"):
+        raise OutputParseError(f"missing or invalid fields: Title in output: {story}")
+    if story.startswith("offline"):
+        raise ConnectionError("fix-up call failed")
+    return {"User Story": story, "roi_percentage": 10.0}, [{"Title": f"{story} tc"}]
+
+
+@pytest.fixture
+def conn(tmp_path):
+    conn = connect(tmp_path / "history.db")
+    yield conn
+    conn.close()
+
+
+def test_failing_story_does_not_stop_the_run():
+    warnings = []
+    estimation_rows, tc_rows, failed = analyze_stories(
+        ["A", "bad B", "offline C", "D"], analyze, warn=warnings.append
+    )
+
+    assert [row["User Story"] for row in estimation_rows] == ["A", "D"]
+    assert [tc["Title"] for tc in tc_rows] == ["A tc", "D tc"]
+    assert failed == ["bad B", "offline C"]
+    assert len(warnings) == 2
+
+
+def test_run_with_failed_story_is_saved_and_completed(conn):
+    run_id = start_run(conn, "gpt-4o", "v1")
+    analyze_stories(["A", "bad B", "C"], analyze, conn, run_id, warn=lambda message: None)
+
+    runs = list_runs(conn)
+    assert [r["run_id"] for r in runs] == [run_id]
+    assert runs[0]["stories"] == 2
+    estimation_rows, _, _ = load_run(conn, run_id)
+    assert [row["User Story"] for row in estimation_rows] == ["A", "C"]
+
+
+def test_unknown_run_warns_and_keeps_results(conn):
+    warnings = []
+    estimation_rows, _, _ = analyze_stories(["A", "B"], analyze, conn, "missing", warn=warnings.append)
+
+    assert len(estimation_rows) == 2
+    assert len(warnings) == 1
+
+
+def test_run_without_analyzed_stories_is_deleted(conn):
+    run_id = start_run(conn, "gpt-4o", "v1")
+    analyze_stories(["bad A", "offline B"], analyze, conn, run_id, warn=lambda message: None)
+
+    assert list_runs(conn, include_incomplete=True) == []
+
+
+def test_interrupted_run_is_deleted(conn):
+    def interrupted(story):
+        if story == "B":
+            raise KeyboardInterrupt
+        return analyze(story)
+
+    run_id = start_run(conn, "gpt-4o", "v1")
+    with pytest.raises(KeyboardInterrupt):
+        analyze_stories(["A", "B", "C"], interrupted, conn, run_id, warn=lambda message: None)
+
+    assert list_runs(conn, include_incomplete=True) == []
+    assert conn.execute("SELECT COUNT(*) FROM story_results").fetchone()[0] == 0
@@ -0,0 +1,151 @@
+import time
+
+import pytest
+
+from services.history_service import (
+    complete_run,
+    connect,
+    delete_run,
+    list_filters,
+    list_runs,
+    load_run,
+    save_story_result,
+    standards_version,
+    start_run,
+    story_hash,
+    story_history,
+)
+
+
+@pytest.fixture
+def conn(tmp_path):
+    conn = connect(tmp_path / "history.db")
+    yield conn
+    conn.close()
+
+
+def estimation(story, roi, manual=1000.0, automation=500.0):
+    return {
+        "User Story": story,
+        "manual_testing_cost": manual,
+        "automation_testing_cost": automation,
+        "roi_percentage": roi,
+        "automation_suitability_score": 70,
+    }
+
+
+def save_run(conn, stories, model="gpt-4o", standards="v1", complete=True):
+    run_id = start_run(conn, model, standards, 1.0)
+    for i, story in enumerate(stories):
+        test_cases = [{"Title": f"{story} tc{j}", "User Story": story} for j in range(2)]
+        save_story_result(conn, run_id, story, estimation(story, roi=10.0 * (i + 1)), test_cases)
+    if complete:
+        complete_run(conn, run_id)
+    return run_id
+
+
+def test_connect_uses_env_path_at_call_time(tmp_path, monkeypatch):
+    path = tmp_path / "env" / "history.db"
+    monkeypatch.setenv("HISTORY_DB_PATH", str(path))
+    connect().close()
+    assert path.exists()
+
+
+def test_story_hash_ignores_case_and_whitespace():
+    assert story_hash("Login works") == story_hash("  login   WORKS ")
+    assert story_hash("Login works") != story_hash("Logout works")
+
+
+def test_standards_version_changes_with_content():
+    assert standards_version("a", "b") == standards_version("a", "b")
+    assert standards_version("a", "b") != standards_version("ab", "")
+
+
+def test_load_run_round_trips_in_order(conn):
+    run_id = save_run(conn, ["First", "Second", "Third"])
+    estimation_rows, tc_rows, multiplier = load_run(conn, run_id)
+
+    assert [row["User Story"] for row in estimation_rows] == ["First", "Second", "Third"]
+    assert estimation_rows[1] == estimation("Second", roi=20.0)
+    assert len(tc_rows) == 6
+    assert multiplier == 1.0
+
+
+def test_duplicate_stories_in_one_run_are_all_kept(conn):
+    run_id = save_run(conn, ["Login works", "login  works", "Other"])
+    estimation_rows, tc_rows, _ = load_run(conn, run_id)
+
+    assert len(estimation_rows) == 3
+    assert len(tc_rows) == 6
+    assert list_runs(conn)[0]["stories"] == 3
+    positions = [r[0] for r in conn.execute(
+        "SELECT position FROM story_results WHERE run_id = ? ORDER BY position", (run_id,)
+    )]
+    assert positions == [0, 1, 2]
+
+
+def test_list_runs_aggregates(conn):
+    save_run(conn, ["A", "B"])
+    run = list_runs(conn)[0]
+
+    assert run["stories"] == 2
+    assert run["manual_testing_cost"] == 2000.0
+    assert run["automation_testing_cost"] == 1000.0
+    assert run["avg_roi_percentage"] == 15.0
+    assert run["completed_at"] is not None
+
+
+def test_list_runs_filters(conn):
+    gpt = save_run(conn, ["A"], model="gpt-4o", standards="v1")
+    time.sleep(1)
+    mini = save_run(conn, ["A"], model="gpt-4o-mini", standards="v2")
+
+    assert [r["run_id"] for r in list_runs(conn)] == [mini, gpt]
+    assert [r["run_id"] for r in list_runs(conn, model="gpt-4o")] == [gpt]
+    assert [r["run_id"] for r in list_runs(conn, standards_version="v2")] == [mini]
+    assert list_runs(conn, model="gpt-4o", standards_version="v2") == []
+
+    mini_created = list_runs(conn, model="gpt-4o-mini")[0]["created_at"]
+    assert [r["run_id"] for r in list_runs(conn, since=mini_created)] == [mini]
+    assert [r["run_id"] for r in list_runs(conn, until=mini_created)] == [gpt]
+    assert list_filters(conn) == {"models": ["gpt-4o", "gpt-4o-mini"], "standards_versions": ["v1", "v2"]}
+
+
+def test_incomplete_runs_are_hidden_by_default(conn):
+    done = save_run(conn, ["A"])
+    partial = save_run(conn, ["B"], model="other", complete=False)
+
+    assert [r["run_id"] for r in list_runs(conn)] == [done]
+    assert {r["run_id"] for r in list_runs(conn, include_incomplete=True)} == {done, partial}
+    assert list_filters(conn)["models"] == ["gpt-4o"]
+    assert list_filters(conn, include_incomplete=True)["models"] == ["gpt-4o", "other"]
+
+
+def test_save_to_unknown_run_raises(conn):
+    with pytest.raises(ValueError, match="Unknown run_id"):
+        save_story_result(conn, "missing", "A", estimation("A", 1.0), [])
+
+
+def test_load_unknown_run_raises(conn):
+    with pytest.raises(ValueError, match="Unknown run_id"):
+        load_run(conn, "missing")
+
+
+def test_delete_run_removes_results(conn):
+    run_id = save_run(conn, ["A", "B"])
+    delete_run(conn, run_id)
+
+    assert list_runs(conn, include_incomplete=True) == []
+    assert conn.execute("SELECT COUNT(*) FROM story_results").fetchone()[0] == 0
+
+
+def test_story_history_spans_completed_runs(conn):
+    first = save_run(conn, ["Login works"])
+    save_run(conn, ["login works"], complete=False)
+    time.sleep(1)
+    second = save_run(conn, ["Other", "LOGIN works"])
+
+    history = story_history(conn, "Login works")
+    assert [row["run_id"] for row in history] == [first, second]
+    assert [row["roi_percentage"] for row in history] == [10.0, 20.0]
+    assert len(story_history(conn, "Login works", include_incomplete=True)) == 3
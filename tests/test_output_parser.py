@@ -0,0 +1,250 @@
+import json
+
+import pytest
+
+from utils.output_parser import (
+    ESTIMATION_SCHEMA,
+    OutputParseError,
+    TEST_CASE_SCHEMA,
+    coerce,
+    describe_schema,
+    extract_json_region,
+    new_parse_stats,
+    parse_estimation,
+    parse_test_cases,
+    repair_json,
+    split_array_items,
+    summarize_parse_stats,
+)
+
+ESTIMATION = {
+    "total_test_cases": 12,
+    "manual_execution_time_per_test_hrs": 0.5,
+    "automation_dev_time_per_test_hrs": 2.0,
+    "automation_maintenance_time_per_cycle_hrs": 1.5,
+    "manual_cost_per_hour": 40.0,
+    "automation_cost_per_hour": 60.0,
+    "tooling_cost_per_year": 1000.0,
+    "execution_cycles_per_year": 24,
+    "estimation_reasoning": "Login flow",
+}
+
+
+# -----------------------------
+# EXTRACTION
+# -----------------------------
+def test_extract_drops_fences_and_prose():
+    assert extract_json_region('Here you go:\n```json\n{"a": 1}\n```\nThanks') == '{"a": 1}'
+
+
+def test_extract_skips_brackets_in_prose():
+    assert extract_json_region('Note [draft]: {"a": 1}') == '{"a": 1}'
+
+
+def test_extract_skips_list_of_scalars_in_prose():
+    assert extract_json_region('See step [1]: [{"Title": "x"}]') == '[{"Title": "x"}]'
+
+
+def test_extract_does_not_return_nested_object_of_broken_array():
+    text = '[{"Title": "a"}, {"Title": oops oops}]'
+    assert extract_json_region(text) == text
+
+
+def test_extract_keeps_truncated_block():
+    assert extract_json_region('Result: {"a": 1, "b": [1, 2') == '{"a": 1, "b": [1, 2'
+
+
+def test_extract_without_brackets_returns_text():
+    assert extract_json_region("  no json here ") == "no json here"
+
+
+# -----------------------------
+# REPAIR RULES
+# -----------------------------
+@pytest.mark.parametrize("broken, expected", [
+    ('{"a": 1,}', {"a": 1}),
+    ('[1, 2,]', [1, 2]),
+    ('{"a": 1,, "b": 2}', {"a": 1, "b": 2}),
+    ('{"a": 1, // comment\n "b": 2}', {"a": 1, "b": 2}),
+    ('{“a”: “b”}', {"a": "b"}),
+    ("{'a': 'b'}", {"a": "b"}),
+    ('{a: 1, b c: 2}', {"a": 1, "b c": 2}),
+    ('{"a": True, "b": None}', {"a": True, "b": None}),
+    ('{"a": [1, 2', {"a": [1, 2]}),
+    ('{"a": "trunc', {"a": "trunc"}),
+])
+def test_repair_rules(broken, expected):
+    assert json.loads(repair_json(broken)) == expected
+
+
+@pytest.mark.parametrize("value", ["x, b: y", "True or None, ok", "url // not a comment", "ends with ,}"])
+def test_repair_does_not_touch_string_content(value):
+    text = '{"a": ' + json.dumps(value) + ', "c": 1,}'
+    assert json.loads(repair_json(text)) == {"a": value, "c": 1}
+
+
+def test_repair_single_quoted_value_containing_colon():
+    fixed = repair_json("{'estimation_reasoning': 'Covers login, note: flaky'}")
+    assert json.loads(fixed) == {"estimation_reasoning": "Covers login, note: flaky"}
+
+
+def test_split_array_items_respects_strings_and_nesting():
+    text = '[{"a": "x, y"}, {"b": [1, 2]}, {"c": "}"}]'
+    assert split_array_items(text) == ['{"a": "x, y"}', '{"b": [1, 2]}', '{"c": "}"}']
+
+
+# -----------------------------
+# COERCION
+# -----------------------------
+@pytest.mark.parametrize("value, expected", [
+    (40, 40.0),
+    ("40", 40.0),
+    ("$1,200.50", 1200.5),
+    ("$40/hr", 40.0),
+    ("2 hrs", 2.0),
+    ("1.5h", 1.5),
+    ("1e3", 1000.0),
+    ("1,000", 1000.0),
+])
+def test_float_coercion(value, expected):
+    estimation = dict(ESTIMATION, manual_cost_per_hour=value)
+    assert coerce(estimation, ESTIMATION_SCHEMA)["manual_cost_per_hour"] == expected
+
+
+@pytest.mark.parametrize("value", [
+    "1.5k", "approx 2-3 hrs", "2-3", "about 40", "1,00", "NaN", float("inf"), True, None, "",
+])
+def test_float_coercion_rejects_ambiguous_values(value):
+    estimation = dict(ESTIMATION, manual_cost_per_hour=value)
+    with pytest.raises(OutputParseError, match="manual_cost_per_hour"):
+        coerce(estimation, ESTIMATION_SCHEMA)
+
+
+def test_int_coercion_and_key_variants():
+    estimation = dict(ESTIMATION)
+    del estimation["total_test_cases"]
+    estimation["Total Test Cases"] = "12"
+    assert coerce(estimation, ESTIMATION_SCHEMA)["total_test_cases"] == 12
+
+
+def test_missing_required_field_is_reported():
+    estimation = dict(ESTIMATION)
+    del estimation["tooling_cost_per_year"]
+    with pytest.raises(OutputParseError, match="tooling_cost_per_year"):
+        coerce(estimation, ESTIMATION_SCHEMA)
+
+
+def test_steps_string_is_split_into_list():
+    test_case = coerce({"Title": "t", "Steps": "1. Open page\n2) Click\n- Done"}, TEST_CASE_SCHEMA)
+    assert test_case["Steps"] == ["Open page", "Click", "Done"]
+
+
+@pytest.mark.parametrize("item, title", [
+    ({"Test Case Name": "Login"}, "Login"),
+    ({"Scenario": "Login"}, "Login"),
+    ({"summary": "Login"}, "Login"),
+    ({"Test Case ID": "TC001", "Steps": ["a"]}, "TC001"),
+    ({"Priority": "High", "Description": "Verify login"}, "Verify login"),
+])
+def test_test_case_title_aliases_and_fallback(item, title):
+    assert coerce(item, TEST_CASE_SCHEMA)["Title"] == title
+
+
+@pytest.mark.parametrize("item", [
+    {"Steps": ["a"]},
+    {"Priority": "High", "Steps": ["a"]},
+    {"Priority": 1, "Objective": "Login"},
+    {"Title": "", "Priority": "High"},
+])
+def test_test_case_without_title_id_or_description_fails(item):
+    with pytest.raises(OutputParseError, match="Title"):
+        coerce(item, TEST_CASE_SCHEMA)
+
+
+def test_missing_reasoning_defaults_to_empty_string():
+    estimation = dict(ESTIMATION)
+    del estimation["estimation_reasoning"]
+    assert coerce(estimation, ESTIMATION_SCHEMA)["estimation_reasoning"] == ""
+
+
+def test_unknown_keys_are_kept():
+    assert coerce({"Title": "t", "Test Data": {"u": "x"}}, TEST_CASE_SCHEMA)["Test Data"] == {"u": "x"}
+
+
+# -----------------------------
+# PARSERS & FIXER
+# -----------------------------
+def test_parse_estimation_records_outcomes():
+    stats = new_parse_stats()
+    parse_estimation(json.dumps(ESTIMATION), stats=stats)
+    parse_estimation("Sure:\n" + json.dumps(ESTIMATION)[:-1] + ",}", stats=stats)
+    with pytest.raises(OutputParseError):
+        parse_estimation("I cannot estimate this story.", stats=stats)
+
+    summary = summarize_parse_stats(stats)
+    assert (summary["parsed"], summary["repaired"], summary["failed"]) == (1, 1, 1)
+    assert summary["total"] == 3
+    assert summary["local_recovery_rate"] == pytest.approx(200 / 3)
+
+
+def test_parse_estimation_after_bracketed_prose():
+    assert parse_estimation("Note [draft]: " + json.dumps(ESTIMATION)) == ESTIMATION
+
+
+def test_parse_test_cases_unwraps_object():
+    assert parse_test_cases('{"test_cases": [{"Title": "a"}]}') == [{"Title": "a"}]
+    assert parse_test_cases('{"notes": ["x"], "test_cases": [{"Title": "a"}]}') == [{"Title": "a"}]
+
+
+def test_fixer_receives_only_broken_item_and_schema():
+    calls = []
+
+    def fixer(fragment, error, schema):
+        calls.append((fragment, error, schema))
+        return '{"Title": "fixed"}'
+
+    stats = new_parse_stats()
+    raw = '[{"Title": "a"}, {"Title": oops oops}, {"Title": "b"}]'
+    test_cases = parse_test_cases(raw, fixer=fixer, stats=stats)
+
+    assert [tc["Title"] for tc in test_cases] == ["a", "fixed", "b"]
+    assert len(calls) == 1
+    assert calls[0][0] == '{"Title": oops oops}'
+    assert calls[0][2] == describe_schema(TEST_CASE_SCHEMA)
+    assert '"Title": str (required)' in calls[0][2]
+    assert stats["llm_fixed"] == 1
+
+
+def test_fixer_not_called_when_local_repair_works():
+    def fixer(fragment, error, schema):
+        raise AssertionError("fixer should not be called")
+
+    estimation = dict(ESTIMATION, manual_cost_per_hour="$40/hr")
+    assert parse_estimation(json.dumps(estimation) + "\n// done", fixer=fixer)["manual_cost_per_hour"] == 40.0
+
+
+def test_fixer_gets_estimation_schema_for_ambiguous_number():
+    schemas = []
+
+    def fixer(fragment, error, schema):
+        schemas.append(schema)
+        return json.dumps(ESTIMATION)
+
+    estimation = dict(ESTIMATION, tooling_cost_per_year="1.5k")
+    assert parse_estimation(json.dumps(estimation), fixer=fixer) == ESTIMATION
+    assert '"tooling_cost_per_year": float (required)' in schemas[0]
+
+
+def test_fixer_error_is_recorded_as_failed():
+    def fixer(fragment, error, schema):
+        raise ConnectionError("network down")
+
+    stats = new_parse_stats()
+    with pytest.raises(ConnectionError):
+        parse_estimation("{broken", fixer=fixer, stats=stats)
+    assert stats["failed"] == 1
+
+
+def test_failed_fixup_raises():
+    with pytest.raises(OutputParseError, match="after fix-up"):
+        parse_estimation("{broken", fixer=lambda fragment, error, schema: "still broken")
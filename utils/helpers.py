@@ -1,7 +1,6 @@
 # agents/helpers.py
 import json
-import re
-from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
+from utils.output_parser import extract_json_region, repair_json, raw_text as output_text
 
 
 # -----------------------------
@@ -10,19 +9,15 @@ from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
 def clean_json(raw):
     """
     Converts raw output from LangChain into a Python object.
-    Handles strings, AIMessage objects, and JSON fences (```json).
+    Handles strings, AIMessage objects, JSON fences (```json), surrounding
+    prose and common defects such as trailing commas.
     """
-    # If it's an AIMessage, get the content
-    if isinstance(raw, AIMessage):
-        raw_text = raw.content
-    else:
-        raw_text = str(raw)
+    raw_text = extract_json_region(output_text(raw))
 
-    # Remove ```json or ``` fences
-    raw_text = re.sub(r"```json|```", "", raw_text).strip()
-
-    # Convert to Python object
-    return json.loads(raw_text)
+    try:
+        return json.loads(raw_text)
+    except json.JSONDecodeError:
+        return json.loads(repair_json(raw_text))
 
 # -----------------------------
 # MONEY FORMATTING